@@ -5,6 +5,8 @@ You will get two classes:
     backtracking pointers alignment algorithm
  * `AlignmentDC` which implements the divide and conquer
     middle node algorithm for alignment
+as well as `AlignmentDPGpu`, an `AlignmentDP` that fills its matrix
+on a GPU, which requires `cupy`.
 Useful functions for creating a scoring matrix that both alignment
 classes accept are also provided and implemented in `helper.py`.
 
@@ -43,4 +45,5 @@ The package also comes with a testing module which can be run with
 """
 from .alignmentDP import AlignmentDP
 from .alignmentDC import AlignmentDC
+from .alignmentDPGpu import AlignmentDPGpu
 from .helper import *
\ No newline at end of file
@@ -0,0 +1,89 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+Compiled fill of the AlignmentDP alignment matrix and backpointers, an
+ahead-of-time alternative to the numba kernel in `_kernels.py`.
+
+Build it in place with `make ext`; `_kernels._fill_dp` uses it when it
+has been built.
+"""
+
+# backtracking pointer bits, as in _kernels
+cdef enum:
+    RIGHT = 1
+    DOWN = 2
+    DIAG = 4
+
+ctypedef fused score_t:
+    short
+    int
+    long long
+    double
+
+
+def fill(score_t[:, ::1] m, unsigned char[:, ::1] b,
+         const signed char[::1] s1_enc, const signed char[::1] s2_enc,
+         const score_t[:, ::1] score_matrix, bint local):
+    """
+    Fill the alignment matrix m and the packed backpointers b in place.
+
+    Parameters
+    ----------
+    m : numpy matrix with shape (len(s2_enc) + 1, len(s1_enc) + 1)
+        alignment matrix, same dtype as score_matrix
+    b : numpy matrix with dtype uint8 and the shape of m
+        backpointers, must be zeroed
+    s1_enc : numpy array with dtype int8
+        encoded first sequence (columns)
+    s2_enc : numpy array with dtype int8
+        encoded second sequence (rows)
+    score_matrix : numpy array with shape (5, 5)
+    local : bool
+        whether to locally align or not
+    """
+    cdef Py_ssize_t rows = m.shape[0]
+    cdef Py_ssize_t cols = m.shape[1]
+    cdef Py_ssize_t i, j
+    cdef signed char a, c
+    cdef score_t mm, d1, d2, m_ij, indel_a
+    cdef unsigned char bij
+
+    m[0, 0] = 0
+    for j in range(1, cols):
+        if local:
+            m[0, j] = 0
+        else:
+            m[0, j] = m[0, j-1] + score_matrix[s1_enc[j-1], 4]
+            b[0, j] = RIGHT
+    for i in range(1, rows):
+        if local:
+            m[i, 0] = 0
+        else:
+            m[i, 0] = m[i-1, 0] + score_matrix[s2_enc[i-1], 4]
+            b[i, 0] = DOWN
+
+    for i in range(1, rows):
+        a = s2_enc[i-1]
+        indel_a = score_matrix[a, 4]
+        for j in range(1, cols):
+            c = s1_enc[j-1]
+            mm = m[i-1, j-1] + score_matrix[a, c]
+            d1 = m[i-1, j] + indel_a
+            d2 = m[i, j-1] + score_matrix[c, 4]
+
+            m_ij = mm
+            if d1 > m_ij:
+                m_ij = d1
+            if d2 > m_ij:
+                m_ij = d2
+            if local and m_ij < 0:
+                m_ij = 0
+
+            bij = 0
+            if m_ij == mm:
+                bij |= DIAG
+            if m_ij == d1:
+                bij |= DOWN
+            if m_ij == d2:
+                bij |= RIGHT
+            m[i, j] = m_ij
+            b[i, j] = bij
@@ -0,0 +1,685 @@
+import os
+import numpy as np
+
+# SEQ_ALIGN_JIT=0 leaves the kernels below uncompiled even with numba installed
+NUMBA_AVAIL = os.environ.get("SEQ_ALIGN_JIT", "1") != "0"
+if NUMBA_AVAIL:
+    try:
+        from numba import njit
+    except ImportError:
+        NUMBA_AVAIL = False
+
+if not NUMBA_AVAIL:
+    def njit(*args, **kwargs):
+        """
+        Stand-in for numba.njit when numba is not installed or disabled:
+        the kernels below run as plain Python instead.
+        """
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda f: f
+
+# the optional compiled fill, built with `make ext`
+CYTHON_AVAIL = True
+try:
+    from ._dp_core import fill as _fill_compiled
+except ImportError:
+    CYTHON_AVAIL = False
+
+# backtracking pointer bits
+RIGHT = 1
+DOWN = 2
+DIAG = 4
+
+# traceback edge codes
+EDGE_RIGHT = 0
+EDGE_DOWN = 1
+EDGE_DIAG = 2
+
+# byte -> nucleotide index (A, C, G, T, - follow the score matrix); -1 is invalid
+_LUT = np.full(256, -1, dtype=np.int8)
+for _i, _c in enumerate(b"ACGT-"):
+    _LUT[_c] = _i
+del _i, _c
+
+# nucleotide index -> byte
+_ALPHABET = np.frombuffer(b"ACGT-", dtype=np.uint8)
+
+
+def _encode(seq):
+    """
+    Encode a nucleotide string as an int8 array of score matrix indices.
+
+    Parameters
+    ----------
+    seq : string
+        sequence made up of the letters A, C, G, T (and -)
+
+    Returns
+    -------
+    numpy array with dtype int8
+        indices 0 to 4 following A, C, G, T, -
+    """
+    enc = _LUT[np.frombuffer(seq.encode('ascii'), dtype=np.uint8)]
+    if np.any(enc < 0):
+        raise ValueError(f"sequence {seq!r} contains letters other than A, C, G, T, -")
+    return enc
+
+
+def _as_sequence(seq):
+    """
+    The string and the encoding (see `_encode`) of a sequence given as either.
+    """
+    if isinstance(seq, np.ndarray):
+        enc = seq.astype(np.int8, copy=False)
+        if np.any((enc < 0) | (enc > 4)):
+            raise ValueError("encoded sequence contains indices other than 0 to 4")
+        return _decode(enc), enc
+    return seq, _encode(seq)
+
+
+def _narrow_scores(score_matrix, length):
+    """
+    Cast an integer score matrix to the narrowest integer dtype that holds
+    every score of an alignment with at most `length` columns, so the DP
+    matrices and rows built from it use as few bytes per cell as possible.
+    Float score matrices are returned as float64.
+    """
+    if not np.issubdtype(score_matrix.dtype, np.integer):
+        return score_matrix.astype(np.float64, copy=False)
+    # every cell is a sum of at most `length` scores, plus one more before the max
+    bound = int(np.abs(score_matrix).max()) * (length + 1)
+    for dtype in (np.int16, np.int32):
+        if bound <= np.iinfo(dtype).max:
+            return score_matrix.astype(dtype, copy=False)
+    return score_matrix.astype(np.int64, copy=False)
+
+
+def _decode(enc):
+    """
+    Decode an array of score matrix indices back to a nucleotide string.
+    """
+    return _ALPHABET[enc].tobytes().decode('ascii')
+
+
+@njit(cache=True, nogil=True)
+def _fill_rows(s1_enc, s2_enc, score_matrix, local):
+    """
+    Fill the alignment matrix and the packed backpointers row by row.
+
+    See `_fill_dp` for the return value.
+    """
+    rows = s2_enc.shape[0] + 1
+    cols = s1_enc.shape[0] + 1
+    m = np.zeros((rows, cols), dtype=score_matrix.dtype)
+    b = np.zeros((rows, cols), dtype=np.uint8)
+
+    # substitution scores of every letter against s1, and indel scores
+    profile = score_matrix[:, s1_enc]
+    indel_s1 = score_matrix[s1_enc, 4]
+    indel_s2 = score_matrix[s2_enc, 4]
+
+    # initialization for global
+    if not local:
+        m[0, 1:] = np.cumsum(indel_s1)
+        m[1:, 0] = np.cumsum(indel_s2)
+        b[0, 1:] = RIGHT
+        b[1:, 0] = DOWN
+
+    # fill the rest of the alignment scores
+    for i in range(1, rows):
+        sub = profile[s2_enc[i-1]]
+        indel_a = indel_s2[i-1]
+        for j in range(1, cols):
+            mm = m[i-1, j-1] + sub[j-1]
+            d1 = m[i-1, j] + indel_a
+            d2 = m[i, j-1] + indel_s1[j-1]
+
+            m_ij = max(mm, d1, d2)
+            if local and m_ij < 0:
+                m_ij = 0
+            m[i, j] = m_ij
+            b[i, j] = (m_ij == mm) * DIAG | (m_ij == d1) * DOWN | (m_ij == d2) * RIGHT
+    return m, b
+
+
+@njit(cache=True, nogil=True)
+def _fill_band(s1_enc, s2_enc, score_matrix, local, lo, m, b):
+    """
+    Fill the cells (i, j) with lo <= j - i < lo + m.shape[1] of the alignment
+    matrix and the packed backpointers, stored at (i, j - i - lo) of m and b.
+
+    Cells outside the matrix are left as they are, so m should be filled
+    with a value below every score and b zeroed beforehand.
+    """
+    rows, width = m.shape
+    cols = s1_enc.shape[0] + 1
+    for i in range(rows):
+        for k in range(width):
+            j = i + lo + k
+            if j < 0 or j >= cols:
+                continue
+            if i == 0 or j == 0:
+                m[i, k] = 0
+                if local or (i == 0 and j == 0):
+                    continue
+                # global initialization, along row 0 or column 0
+                if i == 0:
+                    m[i, k] = m[i, k-1] + score_matrix[s1_enc[j-1], 4]
+                    b[i, k] = RIGHT
+                else:
+                    m[i, k] = m[i-1, k+1] + score_matrix[s2_enc[i-1], 4]
+                    b[i, k] = DOWN
+                continue
+
+            a = s2_enc[i-1]
+            c = s1_enc[j-1]
+            # the cell above is on the next diagonal and the cell to the
+            # left on the previous one, either can be outside the band
+            mm = m[i-1, k] + score_matrix[a, c]
+            d1 = mm
+            d2 = mm
+            has_d1 = k + 1 < width
+            has_d2 = k > 0
+            m_ij = mm
+            if has_d1:
+                d1 = m[i-1, k+1] + score_matrix[a, 4]
+                m_ij = max(m_ij, d1)
+            if has_d2:
+                d2 = m[i, k-1] + score_matrix[c, 4]
+                m_ij = max(m_ij, d2)
+            if local and m_ij < 0:
+                m_ij = 0
+            m[i, k] = m_ij
+            b[i, k] = ((m_ij == mm) * DIAG | (has_d1 and m_ij == d1) * DOWN
+                       | (has_d2 and m_ij == d2) * RIGHT)
+
+
+def _band_offset(s1len, s2len, band):
+    """
+    Lowest diagonal j - i of the band of half-width band around the
+    diagonals joining (0, 0) and (s2len, s1len).
+
+    The band then spans |s1len - s2len| + 2*band + 1 diagonals.
+    """
+    return min(0, s1len - s2len) - band
+
+
+def _fill_dp(s1_enc, s2_enc, score_matrix, local, band=None):
+    """
+    Fill the alignment matrix and the packed backpointers.
+
+    Rows follow s2 and columns follow s1, each with a leading gap row/column.
+    Uses the compiled extension if it has been built, else the numba row
+    kernel when numba is installed and the numpy antidiagonal sweep otherwise.
+
+    With band, only the diagonals within band of those joining (0, 0) and
+    the last cell are filled (see `_band_offset`), and cell (i, j) is
+    stored at (i, j - i - _band_offset(...)). Cells of the band outside the
+    matrix hold the lowest value of the dtype and no backpointers.
+
+    Returns
+    -------
+    (numpy matrix, numpy matrix):
+        the alignment matrix and the backpointers matrix, where each
+        backpointer cell is a uint8 with bits RIGHT (→), DOWN (↓) and DIAG (↘)
+    """
+    score_matrix = _narrow_scores(score_matrix, len(s1_enc) + len(s2_enc))
+    if band is not None:
+        lo = _band_offset(len(s1_enc), len(s2_enc), band)
+        width = abs(len(s1_enc) - len(s2_enc)) + 2*band + 1
+        if np.issubdtype(score_matrix.dtype, np.integer):
+            lowest = np.iinfo(score_matrix.dtype).min
+        else:
+            lowest = -np.inf
+        m = np.full((len(s2_enc)+1, width), lowest, dtype=score_matrix.dtype)
+        b = np.zeros(m.shape, dtype=np.uint8)
+        _fill_band(s1_enc, s2_enc, score_matrix, local, lo, m, b)
+        return m, b
+    if CYTHON_AVAIL:
+        score_matrix = np.ascontiguousarray(score_matrix)
+        m = np.empty((len(s2_enc)+1, len(s1_enc)+1), score_matrix.dtype)
+        b = np.zeros(m.shape, dtype=np.uint8)
+        _fill_compiled(m, b, np.ascontiguousarray(s1_enc), np.ascontiguousarray(s2_enc),
+                       score_matrix, local)
+        return m, b
+    if not NUMBA_AVAIL:
+        return _fill_antidiagonal(s1_enc, s2_enc, score_matrix, local)
+    return _fill_rows(s1_enc, s2_enc, score_matrix, local)
+
+
+def _traceback_stack(starts, max_len):
+    """
+    Set up the depth first search of `_traceback` from the start cells.
+
+    Parameters
+    ----------
+    starts : numpy array with shape (k, 2)
+        cells (row, column) to backtrack from
+    max_len : int
+        upper bound on the number of edges of a path
+
+    Returns
+    -------
+    (numpy matrix, int)
+        search stack with rows (row, column, depth, edge code, index into
+        starts), and the number of cells on it
+    """
+    # each popped cell pushes at most three, so the stack grows by at most
+    # two cells per step along the current path
+    stack = np.empty((len(starts) + 2 * max_len + 3, 5), dtype=np.int64)
+    stack[:len(starts), :2] = starts
+    stack[:len(starts), 2:4] = 0
+    stack[:len(starts), 4] = np.arange(len(starts))
+    return stack, len(starts)
+
+
+@njit(cache=True, nogil=True)
+def _traceback(b, stack, top, path, out_edges, out_lens, out_starts, banded=False):
+    """
+    Follow backpointer paths from the cells on the stack to a cell without
+    pointers, depth first, until out_edges is full or the search is done.
+
+    Call again with the returned stack height to resume the search.
+
+    Parameters
+    ----------
+    b : numpy matrix
+        packed backpointers from `_fill_dp`
+    stack, top : numpy matrix, int
+        search stack and its height, from `_traceback_stack` or the
+        previous call
+    path : numpy array with dtype int8
+        edges of the current path, kept between calls, at least as long as
+        the longest path
+    out_edges : numpy matrix with dtype int8
+        one row per path, filled with the edge codes EDGE_RIGHT, EDGE_DOWN
+        and EDGE_DIAG from the start cell backwards, at least as wide as the
+        longest path
+    out_lens : numpy array
+        number of edges of each path
+    out_starts : numpy array
+        index into the start cells of each path
+    banded : bool, optional
+        whether b is stored by band (see `_fill_dp`), where the cells above
+        are one column further right
+
+    Returns
+    -------
+    (int, int)
+        number of paths found, and the stack height left, 0 once every
+        path is found
+    """
+    shift = 1 if banded else 0
+    n = 0
+    while top > 0 and n < out_edges.shape[0]:
+        top -= 1
+        i = stack[top, 0]
+        j = stack[top, 1]
+        depth = stack[top, 2]
+        start = stack[top, 4]
+        if depth > 0:
+            path[depth-1] = stack[top, 3]
+
+        bij = b[i, j]
+        if bij == 0:
+            if depth > 0:
+                out_edges[n, :depth] = path[:depth]
+                out_lens[n] = depth
+                out_starts[n] = start
+                n += 1
+            continue
+
+        if bij & DIAG:
+            stack[top, 0] = i - 1
+            stack[top, 1] = j - 1 + shift
+            stack[top, 2] = depth + 1
+            stack[top, 3] = EDGE_DIAG
+            stack[top, 4] = start
+            top += 1
+        if bij & DOWN:
+            stack[top, 0] = i - 1
+            stack[top, 1] = j + shift
+            stack[top, 2] = depth + 1
+            stack[top, 3] = EDGE_DOWN
+            stack[top, 4] = start
+            top += 1
+        if bij & RIGHT:
+            stack[top, 0] = i
+            stack[top, 1] = j - 1
+            stack[top, 2] = depth + 1
+            stack[top, 3] = EDGE_RIGHT
+            stack[top, 4] = start
+            top += 1
+    return n, top
+
+
+@njit(cache=True, nogil=True)
+def _paths_to_bytes(edges, lens, ends, s1_enc, s2_enc):
+    """
+    Write out the aligned s1 and s2 of every path found by `_traceback`.
+
+    Parameters
+    ----------
+    edges, lens : numpy matrix, numpy array
+        paths as filled by `_traceback`, from their end backwards
+    ends : numpy array with shape (len(lens), 2)
+        cell (row, column) of the full alignment matrix each path ends at
+    s1_enc, s2_enc : numpy array with dtype int8
+        encoded sequences
+
+    Returns
+    -------
+    (numpy matrix, numpy matrix)
+        ASCII bytes of the aligned s1 and s2, one row per path, as wide as
+        the longest path, of which the first lens[k] bytes belong to path k
+    """
+    n = lens.shape[0]
+    width = 0
+    for k in range(n):
+        width = max(width, lens[k])
+    out1 = np.empty((n, width), dtype=np.uint8)
+    out2 = np.empty((n, width), dtype=np.uint8)
+    gap = _ALPHABET[4]
+    for k in range(n):
+        i = ends[k, 0]
+        j = ends[k, 1]
+        for t in range(lens[k]):
+            pos = lens[k] - 1 - t
+            edge = edges[k, t]
+            if edge == EDGE_DOWN:
+                out1[k, pos] = gap
+            else:
+                j -= 1
+                out1[k, pos] = _ALPHABET[s1_enc[j]]
+            if edge == EDGE_RIGHT:
+                out2[k, pos] = gap
+            else:
+                i -= 1
+                out2[k, pos] = _ALPHABET[s2_enc[i]]
+    return out1, out2
+
+
+def _antidiagonals(X, Y, score_matrix, local, xp=np):
+    """
+    Fill the alignment scoring matrix between the encoded sequences X (rows)
+    and Y (columns) one antidiagonal at a time with numpy.
+
+    Every cell on an antidiagonal depends only on the previous two
+    antidiagonals, so each one is computed with a few vector operations.
+    The array module xp does the work, numpy or a compatible one like cupy
+    with X, Y and score_matrix already on its device.
+
+    Yields
+    ------
+    (int, numpy array, int, numpy array, numpy array, numpy array)
+        for each antidiagonal d: d itself; a buffer where element i is the
+        score of cell (i, d-i), valid for the cells of this antidiagonal
+        only; the row lo of the first cell with i, j >= 1; and the diagonal,
+        down and right candidate scores of the cells with i, j >= 1 starting
+        at row lo (None if there are no such cells)
+    """
+    p = len(X)
+    q = len(Y)
+    dtype = score_matrix.dtype
+    indel_x = score_matrix[X, 4]
+    indel_y = score_matrix[Y, 4]
+    # j = d - i runs backwards along an antidiagonal, so read Y reversed
+    Yr = Y[::-1]
+    indel_yr = indel_y[::-1]
+
+    row0 = xp.zeros(q+1, dtype)
+    col0 = xp.zeros(p+1, dtype)
+    if not local:
+        xp.cumsum(indel_y, out=row0[1:])
+        xp.cumsum(indel_x, out=col0[1:])
+
+    prev2 = xp.zeros(p+1, dtype)
+    prev1 = xp.zeros(p+1, dtype)
+    cur = xp.zeros(p+1, dtype)
+    for d in range(p+q+1):
+        if d <= q:
+            cur[0] = row0[d]
+        if d <= p:
+            cur[d] = col0[d]
+
+        # cells with i, j >= 1
+        lo = max(1, d-q)
+        hi = min(p, d-1)
+        mm = d1 = d2 = None
+        if lo <= hi:
+            k = q - d
+            mm = prev2[lo-1:hi] + score_matrix[X[lo-1:hi], Yr[k+lo:k+hi+1]]
+            d1 = prev1[lo-1:hi] + indel_x[lo-1:hi]
+            d2 = prev1[lo:hi+1] + indel_yr[k+lo:k+hi+1]
+            vals = cur[lo:hi+1]
+            xp.maximum(mm, d1, out=vals)
+            xp.maximum(vals, d2, out=vals)
+            if local:
+                xp.maximum(vals, 0, out=vals)
+
+        yield d, cur, lo, mm, d1, d2
+        prev2, prev1, cur = prev1, cur, prev2
+
+
+def _score_antidiagonal(X, Y, score_matrix, local, max_val=None, soft_max=False):
+    """
+    Last row of the alignment scoring matrix between the encoded sequences
+    X (rows) and Y (columns), filled one antidiagonal at a time with numpy.
+
+    See `_score` for the meaning of the arguments and the return value.
+    """
+    p = len(X)
+    q = len(Y)
+    last = np.zeros(q+1, score_matrix.dtype)
+    max_locs = []
+    for d, cur, lo, mm, _, _ in _antidiagonals(X, Y, score_matrix, local):
+        if max_val is not None and mm is not None:
+            vals = cur[lo:lo+len(mm)]
+            if soft_max:
+                vals_max = vals.max()
+                if vals_max > max_val:
+                    max_val = vals_max
+                    max_locs = []
+            for i in np.flatnonzero(vals == max_val):
+                max_locs.append((lo+int(i), d-lo-int(i)))
+        if p <= d <= p+q:
+            last[d-p] = cur[p]
+
+    if max_val is not None:
+        max_locs.sort()
+        return last, max_locs, max_val
+    return last
+
+
+def _fill_antidiagonal(s1_enc, s2_enc, score_matrix, local, xp=np):
+    """
+    Fill the alignment matrix and the packed backpointers one antidiagonal
+    at a time with numpy, or the array module xp (see `_antidiagonals`),
+    which then also holds the returned matrices.
+
+    See `_fill_dp` for the return value.
+    """
+    p = len(s2_enc)
+    q = len(s1_enc)
+    m = xp.empty((p+1, q+1), score_matrix.dtype)
+    b = xp.zeros((p+1, q+1), dtype=np.uint8)
+    if not local:
+        b[0, 1:] = RIGHT
+        b[1:, 0] = DOWN
+
+    # cell (i, d-i) is element i*q + d of the flattened matrices, so an
+    # antidiagonal is a strided slice of them
+    m_flat = m.reshape(-1)
+    b_flat = b.reshape(-1)
+    step = max(q, 1)
+    for d, cur, lo, mm, d1, d2 in _antidiagonals(s2_enc, s1_enc, score_matrix, local, xp):
+        i0 = max(0, d-q)
+        i1 = min(p, d)
+        m_flat[i0*q+d:i1*q+d+1:step] = cur[i0:i1+1]
+        if mm is not None:
+            vals = cur[lo:lo+len(mm)]
+            b_flat[lo*q+d:(lo+len(mm)-1)*q+d+1:step] = ((vals == mm) * DIAG
+                                                        | (vals == d1) * DOWN
+                                                        | (vals == d2) * RIGHT)
+    return m, b
+
+
+@njit(cache=True, nogil=True)
+def _sweep(X, Y, score_matrix, local, x0, x1, reverse, s0, s1, track, max_val, soft_max):
+    """
+    Fill the scoring rows of X[x0:x1] (rows) against Y (columns) in the two
+    buffers s0 and s1, swapping them after every row. With reverse, both
+    sequences are read back to front without materializing reversed copies.
+
+    See `_score` for the meaning of local, track, max_val and soft_max; the
+    tracked cells are in the coordinates of the sequences as read.
+
+    Returns
+    -------
+    (numpy array, numpy array, list, float)
+        the last row, the spare buffer, the cells holding max_val and max_val
+    """
+    q = Y.shape[0]
+    # substitution scores of every letter against Y, and indel scores of Y,
+    # in the order Y is read
+    profile = np.empty((5, q), dtype=score_matrix.dtype)
+    indel_y = np.empty(q, dtype=score_matrix.dtype)
+    for j in range(q):
+        c = Y[q-1-j] if reverse else Y[j]
+        profile[:, j] = score_matrix[:, c]
+        indel_y[j] = score_matrix[c, 4]
+
+    s0[0] = 0
+    if local:
+        s0[1:] = 0
+    else:
+        s0[1:] = np.cumsum(indel_y)
+    max_locs = [(0, 0) for _ in range(0)]
+    for i in range(1, x1-x0+1):
+        a = X[x1-i] if reverse else X[x0+i-1]
+        sub = profile[a]
+        indel_a = score_matrix[a, 4]
+        if local:
+            s1[0] = 0
+        else:
+            s1[0] = s0[0] + indel_a
+        for j in range(1, q+1):
+            v = max(s0[j-1] + sub[j-1],
+                    s0[j] + indel_a,
+                    s1[j-1] + indel_y[j-1])
+            if local and v < 0:
+                v = 0
+            s1[j] = v
+            if track:
+                if soft_max and v > max_val:
+                    max_val = v
+                    max_locs.clear()
+                    max_locs.append((i, j))
+                elif v == max_val:
+                    max_locs.append((i, j))
+        s0, s1 = s1, s0
+    return s0, s1, max_locs, max_val
+
+
+@njit(cache=True, nogil=True)
+def _sweep_forward_reverse(X, Y, score_matrix, local, xmid):
+    """
+    Last rows of the scoring matrices of X[:xmid] against Y and of
+    X[xmid:] against Y, both read back to front, sharing scratch buffers.
+    """
+    q = Y.shape[0]
+    dtype = score_matrix.dtype
+    scoreL, spare, _, _ = _sweep(X, Y, score_matrix, local, 0, xmid, False,
+                                 np.empty(q+1, dtype), np.empty(q+1, dtype), False, 0.0, False)
+    scoreR, _, _, _ = _sweep(X, Y, score_matrix, local, xmid, X.shape[0], True,
+                             spare, np.empty(q+1, dtype), False, 0.0, False)
+    return scoreL, scoreR
+
+
+def _score(X, Y, score_matrix, local, max_val=None, soft_max=False):
+    """
+    Last row of the alignment scoring matrix between the encoded sequences
+    X (rows) and Y (columns).
+
+    Uses the numba row kernel when numba is installed and the numpy
+    antidiagonal sweep otherwise.
+
+    Parameters
+    ----------
+    X : numpy array
+        encoded first sequence
+    Y : numpy array
+        encoded second sequence
+    score_matrix : numpy array with shape (5, 5)
+    local : bool
+        if True, scores are floored at 0 and the first row/column are 0
+    max_val : float, optional
+        if given, also find the cells (i, j), i, j >= 1, holding max_val
+    soft_max : bool, optional
+        with max_val, raise max_val to the largest score in the matrix first
+
+    Returns
+    -------
+    numpy array OR (numpy array, list, float)
+        the last row, plus the row-major sorted cells holding max_val and
+        max_val itself if max_val was given
+    """
+    score_matrix = _narrow_scores(score_matrix, len(X) + len(Y))
+    if not NUMBA_AVAIL:
+        return _score_antidiagonal(X, Y, score_matrix, local, max_val, soft_max)
+    track = max_val is not None
+    q = len(Y)
+    dtype = score_matrix.dtype
+    last, _, max_locs, max_val_found = _sweep(X, Y, score_matrix, local, 0, len(X), False,
+                                              np.empty(q+1, dtype), np.empty(q+1, dtype),
+                                              track, float(max_val) if track else 0.0, soft_max)
+    if track:
+        return last, max_locs, max_val_found
+    return last
+
+
+def _warm_up(score_matrix, local):
+    """
+    Compile the numba kernels for the dtype of score_matrix ahead of time.
+
+    The kernels are compiled for each score dtype `_narrow_scores` picks,
+    which depends on the sequence lengths, so aligning short sequences
+    first does not compile the wider kernels that long ones need. Pass
+    the score matrix as narrowed for the alignment to prepare.
+
+    Parameters
+    ----------
+    score_matrix : numpy array with shape (5, 5)
+        score matrix with the dtype to compile for, used as is
+    local : bool
+        local or global alignment
+    """
+    if not NUMBA_AVAIL:
+        return
+    X = _encode("ACGT")
+    Y = _encode("AGT")
+    dtype = score_matrix.dtype
+    _fill_rows(X, Y, score_matrix, local)
+    # the local divide and conquer also scores reversed views
+    for X_, Y_ in ((X, Y), (X[::-1], Y[::-1])):
+        _sweep(X_, Y_, score_matrix, local, 0, len(X_), False,
+               np.empty(len(Y_)+1, dtype), np.empty(len(Y_)+1, dtype), True, 0.0, True)
+    _sweep_forward_reverse(X, Y, score_matrix, local, len(X)//2)
+
+
+def _score_forward_reverse(X, Y, score_matrix, local, xmid):
+    """
+    Scores for the middle node search of the divide and conquer alignment.
+
+    Returns
+    -------
+    (numpy array, numpy array)
+        the last row of the scoring matrix of X[:xmid] against Y, and the
+        last row of X[xmid:] against Y with both read back to front
+    """
+    score_matrix = _narrow_scores(score_matrix, len(X) + len(Y))
+    if not NUMBA_AVAIL:
+        return (_score_antidiagonal(X[:xmid], Y, score_matrix, local),
+                _score_antidiagonal(X[xmid:][::-1], Y[::-1], score_matrix, local))
+    return _sweep_forward_reverse(X, Y, score_matrix, local, xmid)
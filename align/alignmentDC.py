@@ -1,6 +1,38 @@
 import numpy as np
 import math
+import os
+from concurrent.futures import ThreadPoolExecutor
 from .alignmentDP import AlignmentDP
+from ._kernels import _as_sequence, _score, _score_forward_reverse
+
+# subproblems with at least this many cells (len(X)*len(Y)) hand their
+# right halves to the thread pool, smaller ones recurse sequentially
+PARALLEL_AREA = 1 << 16
+
+def _starts_with_gap(alignment):
+    """
+    Whether a rope alignment (see `AlignmentDC.align_helper`) starts with a gap in s1.
+    """
+    while not isinstance(alignment[0], str):
+        alignment = alignment[0]
+    return alignment[0][:1] == '-'
+
+def _join_alignment(alignment):
+    """
+    Turn a rope alignment (see `AlignmentDC.align_helper`) into a tuple of strings.
+    """
+    s1_parts = []
+    s2_parts = []
+    stack = [alignment]
+    while stack:
+        node = stack.pop()
+        if isinstance(node[0], str):
+            s1_parts.append(node[0])
+            s2_parts.append(node[1])
+        else:
+            stack.append(node[1])
+            stack.append(node[0])
+    return ''.join(s1_parts), ''.join(s2_parts)
 
 class AlignmentDC():
     """
@@ -18,6 +50,8 @@ class AlignmentDC():
         created by align()
     local: bool
         whether to locally align or not
+    workers : int
+        number of threads used for the subproblems of align()
 
     Methods
     -------
@@ -27,14 +61,15 @@ class AlignmentDC():
     print_alignments():
         print the alignments in a pretty way
     """
-    def __init__(self, s1, s2, score_matrix, local=False):
+    def __init__(self, s1, s2, score_matrix, local=False, workers=None):
         """
         Parameters
         ----------
-        s1 : string
-            first string to align
-        s2 : string
-            second string to align
+        s1 : string or numpy array
+            first string to align, or its encoding (int8 indices 0 to 4
+            following A, C, G, T, -)
+        s2 : string or numpy array
+            second string to align, or its encoding
         score_matrix :
             numpy array with shape (5, 5)
             indices 0 to 4 for rows and columns follow A, C, G, T, -
@@ -42,11 +77,19 @@ class AlignmentDC():
         local : bool, optional
             if True, changes to local alignment
             default is global alignment
+        workers : int, optional
+            number of threads to solve independent subproblems with
+            defaults to the number of CPUs, 1 aligns sequentially
         """
-        self.s1 = s1
-        self.s2 = s2
+        self.s1, self.s1_enc = _as_sequence(s1)
+        self.s2, self.s2_enc = _as_sequence(s2)
         self.score_matrix = score_matrix
         self.local = local
+        self.workers = workers or os.cpu_count() or 1
+        self._pool = None
+        # results of the subproblems solved during align(), keyed by the
+        # align_helper arguments
+        self._memo = None
 
         # nucleotide_index
         self.ni = {"A": 0, "C": 1, "G": 2, "T": 3, "-": 4}
@@ -66,73 +109,62 @@ class AlignmentDC():
         """
         Returns the last column in the alignment scoring matrix between X and Y
         for global alignment. Also can return where a certain value occurred.
+
+        X and Y are encoded sequences (see `_encode`).
         """
         if max_bool:
-            max_locs = []
-        s0 = np.zeros(len(Y)+1)
-        s1 = np.zeros(len(Y)+1)
-        for j in range(1, len(Y)+1):
-            s0[j] = s0[j-1] + self.indel(Y[j-1])
-        for i in range(1, len(X)+1):
-            s1[0] = s0[0] + self.indel(X[i-1])
-            for j in range(1, len(Y)+1):
-                score_match = s0[j-1] + self.match(X[i-1], Y[j-1])
-                score_del = s0[j] + self.indel(X[i-1])
-                score_ins = s1[j-1] + self.indel(Y[j-1])
-                s1[j] = max(score_match, score_del, score_ins)
-                if max_bool and s1[j] == max_val:
-                        max_locs.append((i,j))
-            s0 = np.copy(s1)
-        if max_bool:
-            return s1, max_locs, max_val
-        return s1
+            return _score(X, Y, self.score_matrix, False, max_val=max_val)
+        return _score(X, Y, self.score_matrix, False)
     
     def score_local(self, X,Y, max_bool=False, max_val=0, soft_max=True):
         """
         Returns the last column in the alignment scoring matrix between X and Y
         for local alignment. Also can return the maximum value and where it occurred.
+
+        X and Y are encoded sequences (see `_encode`).
         """
         if max_bool:
-            max_locs = []
-        s0 = np.zeros(len(Y)+1)
-        s1 = np.zeros(len(Y)+1)
-        for i in range(1, len(X)+1):
-            s1[0] = 0
-            for j in range(1, len(Y)+1):
-                score_match = s0[j-1] + self.match(X[i-1], Y[j-1])
-                score_del = s0[j] + self.indel(X[i-1])
-                score_ins = s1[j-1] + self.indel(Y[j-1])
-                s1[j] = max(0, score_match, score_del, score_ins)
-                if max_bool:
-                    if soft_max and s1[j] > max_val:
-                        max_val = s1[j]
-                        max_locs = [(i, j)]
-                    elif s1[j] == max_val:
-                        max_locs.append((i,j))
-            s0 = np.copy(s1)
-        if max_bool:
-            return s1, max_locs, max_val
-        return s1
+            return _score(X, Y, self.score_matrix, True,
+                          max_val=max_val, soft_max=soft_max)
+        return _score(X, Y, self.score_matrix, True)
     
-    def align_helper(self, X, Y, local=False):
+    def align_helper(self, x0, x1, y0, y1, local=False):
         """
-        Divide and conquer alignment algorithm
+        Divide and conquer alignment algorithm on s1[x0:x1] and s2[y0:y1]
+
+        Results are memoized by index range during align(), so subproblems
+        shared by several middle nodes are only solved once. When align()
+        runs with a thread pool, the halves right of the middle nodes of
+        large subproblems are solved concurrently with the left halves.
+
+        Alignments are ropes: either a leaf tuple of strings (Z, W) or a pair
+        (left rope, right rope), so joining halves never copies strings and
+        subproblems share their results. An alignment that crosses column
+        xmid at several middle nodes is only built through the last of them,
+        which makes the results distinct without hashing any strings.
 
         Parameters
         ----------
-        X : string
-            first string to align
-        Y : string
-            second string to align
+        x0, x1 : int
+            start and end of the range of s1 to align
+        y0, y1 : int
+            start and end of the range of s2 to align
         local : bool, optional
             set to True for local alignment
             defaults to global alignment
 
         Returns
         -------
-        list
-            a list of tuples with the string representations of the alignments between X and Y
+        tuple
+            ropes of the distinct alignments between s1[x0:x1] and s2[y0:y1]
         """
+        memo = self._memo
+        key = (x0, x1, y0, y1, local)
+        if memo is not None and key in memo:
+            return memo[key]
+
+        X = self.s1[x0:x1]
+        Y = self.s2[y0:y1]
         Z = ""
         W = ""
         xlen = len(X)
@@ -160,32 +192,39 @@ class AlignmentDC():
             xmid = len(X)//2
 
             # find middle node(s)
-            if local:
-                scoreL = self.score_local(X[:xmid], Y)
-                scoreR = self.score_local(X[xmid:][::-1], Y[::-1])
-            else:
-                scoreL = self.score(X[:xmid], Y)
-                scoreR = self.score(X[xmid:][::-1], Y[::-1])
+            scoreL, scoreR = _score_forward_reverse(self.s1_enc[x0:x1], self.s2_enc[y0:y1],
+                                                    self.score_matrix, local, xmid)
             score = scoreL + np.flip(scoreR)
-            ymids = np.where(score == np.max(score))[0]
+            ymids = np.flatnonzero(score == score.max())
 
             del score
             del scoreR
             del scoreL
 
             # find alignment(s)
-            ZWs = set()
-            for ymid in ymids:
-                ZWLs = self.align_helper(X[:xmid], Y[:ymid])
-                ZWRs = self.align_helper(X[xmid:], Y[ymid:])
+            halves = [((x0, x0+xmid, y0, y0+int(ymid)), (x0+xmid, x1, y0+int(ymid), y1))
+                      for ymid in ymids]
+            if self._pool is not None and xlen*ylen >= PARALLEL_AREA:
+                futures = [self._pool.submit(self.align_helper, *right) for _, right in halves]
+                lefts = [self.align_helper(*left) for left, _ in halves]
+                # take back right halves no worker has started yet
+                rights = [self.align_helper(*right) if future.cancel() else future.result()
+                          for future, (_, right) in zip(futures, halves)]
+            else:
+                lefts = [self.align_helper(*left) for left, _ in halves]
+                rights = [self.align_helper(*right) for _, right in halves]
+            ZWs = []
+            for ZWLs, ZWRs in zip(lefts, rights):
+                # a right half starting with a gap in X is the same alignment
+                # as the one split at the next middle node down
+                ZWRs = [ZWR for ZWR in ZWRs if not _starts_with_gap(ZWR)]
                 for ZWL in ZWLs:
-                    # ZL = ZWL[0]
-                    # WL = ZWL[1]
                     for ZWR in ZWRs:
-                        # ZR = ZWR[0]
-                        # WR = ZWR[1]
-                        ZWs.add((ZWL[0]+ZWR[0], ZWL[1]+ZWR[1]))
-        return list(ZWs)
+                        ZWs.append((ZWL, ZWR))
+        ZWs = tuple(ZWs)
+        if memo is not None:
+            memo[key] = ZWs
+        return ZWs
 
     def align(self):
         """
@@ -196,12 +235,31 @@ class AlignmentDC():
         list
             a list of tuples with the string representations of the alignments between s1 and s2
         """
+        self._memo = {}
+        try:
+            if self.workers > 1:
+                with ThreadPoolExecutor(self.workers) as pool:
+                    self._pool = pool
+                    try:
+                        return self._align()
+                    finally:
+                        self._pool = None
+            return self._align()
+        finally:
+            # drop the memoized ropes, also if the alignment failed; the
+            # pool has shut down by now, so no worker adds to them later
+            self._memo = None
+
+    def _align(self):
+        """
+        align() with the thread pool, if any, already set up
+        """
         #
         # global
         #
         if not self.local:
-            alignments = self.align_helper(self.s1, self.s2)
-            alignments = list(set(alignments))
+            alignments = [_join_alignment(ZW) for ZW in
+                          self.align_helper(0, len(self.s1), 0, len(self.s2))]
             alignments.sort()
             self.alignments = alignments
             return alignments
@@ -211,18 +269,35 @@ class AlignmentDC():
         #
         alignments = []
         # find the alignment end nodes
-        _, max_loc_ends, maxval = self.score_local(self.s1, self.s2, max_bool=True)
+        _, max_loc_ends, maxval = self.score_local(self.s1_enc, self.s2_enc, max_bool=True)
+        # find every node an optimal local alignment can start from with one
+        # reverse pass, so each end node's search below only has to go back
+        # as far as the earliest of these candidates
+        # (positive indel scores along the first row/column are lost to the
+        # local boundary in that pass, so then search the whole prefix)
+        s1len = len(self.s1)
+        s2len = len(self.s2)
+        if np.all(self.score_matrix[:4, 4] <= 0):
+            _, max_loc_revs, _ = self.score_local(self.s1_enc[::-1], self.s2_enc[::-1], max_bool=True)
+            candidates = np.array([(s1len-i, s2len-j) for i, j in max_loc_revs], dtype=int).reshape(-1, 2)
+        else:
+            candidates = np.zeros((1, 2), dtype=int)
         # find the alignment start nodes associated with each end node
         max_loc_starts = []
         for mle in max_loc_ends:
-            _, mlss, _ = self.score(self.s1[:mle[0]][::-1], self.s2[:mle[1]][::-1], max_bool=True, max_val=maxval)
+            before = candidates[(candidates[:, 0] < mle[0]) & (candidates[:, 1] < mle[1])]
+            if len(before) == 0:
+                max_loc_starts.append([])
+                continue
+            x0, y0 = before.min(axis=0)
+            _, mlss, _ = self.score(self.s1_enc[x0:mle[0]][::-1], self.s2_enc[y0:mle[1]][::-1], max_bool=True, max_val=maxval)
             max_loc_starts.append([(mle[0]-mls[0], mle[1]-mls[1]) for mls in mlss])
         # divide and conquer on each start node and end node pair and add the alignments found
         for max_loc_end, mlss in zip(max_loc_ends, max_loc_starts):
             for max_loc_start in mlss:
-                s1_trim = self.s1[max_loc_start[0]:max_loc_end[0]]
-                s2_trim = self.s2[max_loc_start[1]:max_loc_end[1]]
-                alignments.extend(self.align_helper(s1_trim, s2_trim))
+                alignments.extend(_join_alignment(ZW) for ZW in
+                                  self.align_helper(max_loc_start[0], max_loc_end[0],
+                                                    max_loc_start[1], max_loc_end[1]))
         alignments.sort()
         self.alignments = alignments
         return alignments
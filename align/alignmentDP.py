@@ -1,4 +1,10 @@
 import numpy as np
+from ._kernels import (_as_sequence, _fill_dp, _band_offset, _traceback_stack, _traceback,
+                       _paths_to_bytes, RIGHT, DOWN, DIAG)
+
+# largest buffer of backtracking edges, in bytes; paths are found and
+# decoded in batches that fit it, so only the alignments grow with their count
+TRACEBACK_BYTES = 1 << 22
 
 class AlignmentDP():
     """
@@ -16,6 +22,15 @@ class AlignmentDP():
         created by align(), specifically find_alignments()
     local: bool
         whether to locally align or not
+    band : int or None
+        half-width of the diagonal band alignments are restricted to, if any
+    m : numpy array
+        the alignment matrix, created by create_matrix_and_backpointers()
+        with band, only the band is stored, one row per row of the full matrix
+    b : numpy array with dtype uint8
+        the backtracking pointers, created by create_matrix_and_backpointers()
+        each cell ORs together the bits RIGHT (→), DOWN (↓) and DIAG (↘)
+        stored like m
 
     Methods
     -------
@@ -24,6 +39,10 @@ class AlignmentDP():
         returns alignments found
     create_matrix_and_backpointers():
         creates alignment matrix and backpointers
+    print_fill_steps():
+        step through the alignment matrix one cell at a time (used by verbose)
+    unbanded():
+        lay out a matrix stored by band like the full matrix
     find_alignments():
         finds alignments globally or locally depending on the value of local
         requires that create_matrix_and_backpointers() is run first
@@ -34,14 +53,15 @@ class AlignmentDP():
     print_alignments():
         print the alignments in a pretty way
     """
-    def __init__(self, s1, s2, score_matrix, local=False, verbose=False):
+    def __init__(self, s1, s2, score_matrix, local=False, verbose=False, band=None):
         """
         Parameters
         ----------
-        s1 : string
-            first string to align
-        s2 : string
-            second string to align
+        s1 : string or numpy array
+            first string to align, or its encoding (int8 indices 0 to 4
+            following A, C, G, T, -)
+        s2 : string or numpy array
+            second string to align, or its encoding
         score_matrix :
             numpy array with shape (5, 5)
             indices 0 to 4 for rows and columns follow A, C, G, T, -
@@ -51,19 +71,23 @@ class AlignmentDP():
             default is global alignment
         verbose : bool, optional
             step through the alignment and backtracking pointer creation process
+        band : int, optional
+            only fill the cells whose diagonal j - i is at most band away
+            from the diagonals between the first and last cells, and only
+            find the optimal alignments within that band
+            useful for similar sequences, takes O(band * len) time and memory
+            default fills the whole matrix
         """
-        self.s1 = "-" + s1
-        self.s2 = "-" + s2
+        self.s1, self.s1_enc = _as_sequence(s1)
+        self.s2, self.s2_enc = _as_sequence(s2)
         self.score_matrix = score_matrix
         self.local = local
         self.verbose = verbose
+        self.band = band
 
         # nucleotide_index
         self.ni = {"A": 0, "C": 1, "G": 2, "T": 3, "-": 4}
 
-        # backtracking pointer index
-        self.bi = {"→": 0, "↓": 1, "↘": 2}
-
     def indel(self, C):
         """
         Indel score (usually a negative penalty)
@@ -84,63 +108,45 @@ class AlignmentDP():
         (numpy matrix, numpy matrix):
             Returns the alignment matrix and the backpointers matrix
         """
-        verbose = self.verbose
-        local = self.local
-        s1len = len(self.s1)
-        s2len = len(self.s2)
-        
-        # allocate alignment matrix and backpointer matrix
-        m = np.array([[0.0 for i in range(s1len)] for j in range(s2len)])
-        b = np.array([[(False, False, False) for i in range(s1len)] for j in range(s2len)])
-
-        # initialization for global
-        if not local:
-            # initialize first row
-            for j in range(1,s1len):
-                m[0, j] = m[0, j-1] + self.indel(self.s1[j])
-                b[0, j, self.bi["→"]] = True
-
-            # initialize first column
-            for i in range(1,s2len):
-                m[i, 0] = m[i-1, 0] + self.indel(self.s2[i])
-                b[i, 0, self.bi["↓"]] = True
-            
-        # fill the rest of the alignment scores
-        for i in range(1, s2len):
-            for j in range(1, s1len):
-                
-                match_mismatch = m[i-1, j-1] + self.match(self.s2[i], self.s1[j])
-                indel_s1_gap = m[i-1, j] + self.indel(self.s2[i])
-                indel_s2_gap = m[i, j-1] + self.indel(self.s1[j])
-
-                if local:
-                    m[i, j] = max(0, match_mismatch, indel_s1_gap, indel_s2_gap)
-                else:
-                    m[i, j] = max(match_mismatch, indel_s1_gap, indel_s2_gap)
-
-                if m[i, j] == match_mismatch: 
-                    b[i, j, self.bi["↘"]] = True
-                if m[i, j] == indel_s1_gap:
-                    b[i, j, self.bi["↓"]] = True
-                if m[i, j] == indel_s2_gap:
-                    b[i, j, self.bi["→"]] = True
-
-                if verbose:
-                    print(f"{self.s1[j]} {self.s2[i]}")
-                    print(m)
-                    print("Press ENTER to continue...")
-                    input()
+        m, b = self._fill()
         self.m = m
         self.b = b
+        if self.verbose:
+            self.print_fill_steps()
         return m, b
 
+    def _fill(self):
+        """
+        Compute the alignment matrix and backpointers (see `_fill_dp`).
+        """
+        return _fill_dp(self.s1_enc, self.s2_enc, self.score_matrix, self.local, self.band)
+
+    def print_fill_steps(self):
+        """
+        Step through the filled alignment matrix one cell at a time,
+        showing the scores computed up to that cell.
+
+        Run create_matrix_and_backpointers first.
+        """
+        full = self.unbanded(self.m)
+        s2len, s1len = full.shape
+        for i in range(1, s2len):
+            for j in range(1, s1len):
+                m = full.copy()
+                m[i, j+1:] = 0
+                m[i+1:, 1:] = 0
+                print(f"{self.s1[j-1]} {self.s2[i-1]}")
+                print(m)
+                print("Press ENTER to continue...")
+                input()
+
     def print_alignment_matrix(self):
         """
         Print the alignment matrix. 
         
         Run create_matrix_and_backpointers first.
         """
-        print(self.m)
+        print(self.unbanded(self.m))
 
     def print_backtrack_matrix(self, length=3):
         """
@@ -148,20 +154,37 @@ class AlignmentDP():
         
         Run create_matrix_and_backpointers first.
         """
-        for row in self.b:
+        for row in self.unbanded(self.b):
             for pointers in row:
                 to_print = ''
-                if pointers[0] == True:
+                if pointers & RIGHT:
                     to_print += "→"
-                if pointers[1] == True:
+                if pointers & DOWN:
                     to_print += "↓"
-                if pointers[2] == True:
+                if pointers & DIAG:
                     to_print += "↘"
-                if not np.any(pointers):
+                if not pointers:
                     to_print += "s"
                 print('{:{length}}'.format(to_print, length=length), end='')
             print()
 
+    def unbanded(self, a):
+        """
+        Lay out a matrix stored by band (m or b, with band) like the full
+        matrix, with zeros outside the band. Other matrices are returned as is.
+        """
+        if self.band is None:
+            return a
+        s2len = len(self.s2) + 1
+        s1len = len(self.s1) + 1
+        lo = _band_offset(len(self.s1), len(self.s2), self.band)
+        full = np.zeros((s2len, s1len), dtype=a.dtype)
+        i, k = np.indices(a.shape)
+        j = i + lo + k
+        inside = (j >= 0) & (j < s1len)
+        full[i[inside], j[inside]] = a[inside]
+        return full
+
     def find_alignments(self):
         """
         Find all optimal alignments.
@@ -174,48 +197,47 @@ class AlignmentDP():
             a list of tuples with the string representations of the alignments between s1 and s2
         """
         local = self.local
-        # initalize alignment stack: this will hold intermediate alignments until
-        # a full alignment is found and placed in final_alignment
-        i, j = self.m.shape
+        s2len = len(self.s2) + 1
+        s1len = len(self.s1) + 1
+        # start cells are in the coordinates of self.b, which are shifted
+        # along each row by the row and the band offset with band
+        lo = 0
+        if self.band is not None:
+            lo = _band_offset(len(self.s1), len(self.s2), self.band)
         if local:
             # find largest value (can have multiple) and backtrack from there
-            indices = np.where(self.m==np.max(self.m))
-            alignment_stack = []
-            for i in range(len(indices[0])):
-                alignment_stack.append(((indices[0][i],indices[1][i]),'', ''))
-
+            flat = np.flatnonzero(self.m.ravel() == self.m.max())
+            starts = np.column_stack(np.divmod(flat, self.m.shape[1]))
+        elif self.band is not None:
+            starts = np.array([[s2len-1, s1len-1 - (s2len-1) - lo]])
         else:
-            alignment_stack = [((i-1,j-1),'', '')]
-        alignments = []
+            starts = np.array([[s2len-1, s1len-1]])
 
-        def process_new_alignment(new_location, new_s2_alignment, new_s1_alignment):
-            if not np.any(self.b[new_location[0], new_location[1]]):
-                alignments.append((new_s1_alignment[::-1], new_s2_alignment[::-1]))
-            else:
-                alignment_stack.append((new_location, new_s2_alignment, new_s1_alignment))
-        
-        # find alignments
-        while len(alignment_stack) != 0:
-            location, s2_alignment, s1_alignment = alignment_stack.pop()
-
-            # match/mismatch
-            if self.b[location[0], location[1], 2]:
-                new_s2_alignment = s2_alignment + self.s2[location[0]]
-                new_s1_alignment = s1_alignment + self.s1[location[1]]
-                new_location = (location[0]-1, location[1]-1)
-                process_new_alignment(new_location, new_s2_alignment, new_s1_alignment)
-            # gap in s1
-            if self.b[location[0], location[1], 1]:
-                new_s2_alignment = s2_alignment + self.s2[location[0]]
-                new_s1_alignment = s1_alignment + '-'
-                new_location = (location[0]-1, location[1])
-                process_new_alignment(new_location, new_s2_alignment, new_s1_alignment)
-            # gap in s2
-            if self.b[location[0], location[1], 0]:
-                new_s2_alignment = s2_alignment + '-'
-                new_s1_alignment = s1_alignment + self.s1[location[1]]
-                new_location = (location[0], location[1]-1)
-                process_new_alignment(new_location, new_s2_alignment, new_s1_alignment)
+        # find alignments a batch at a time, doubling the batch up to
+        # TRACEBACK_BYTES of edges
+        max_len = s1len + s2len
+        stack, top = _traceback_stack(starts, max_len)
+        path = np.empty(max_len, dtype=np.int8)
+        max_paths = max(1, min(16, TRACEBACK_BYTES // max_len))
+        alignments = []
+        while top > 0:
+            edges = np.empty((max_paths, max_len), dtype=np.int8)
+            lens = np.empty(max_paths, dtype=np.int64)
+            path_starts = np.empty(max_paths, dtype=np.int64)
+            n_paths, top = _traceback(self.b, stack, top, path, edges, lens, path_starts,
+                                      self.band is not None)
+            # cells in the full alignment matrix each path ends at
+            ends = starts[path_starts[:n_paths]]
+            if self.band is not None:
+                ends[:, 1] += ends[:, 0] + lo
+            s1_bytes, s2_bytes = _paths_to_bytes(edges, lens[:n_paths], ends,
+                                                 self.s1_enc, self.s2_enc)
+            alignments += [(s1_bytes[k, :lens[k]].tobytes().decode('ascii'),
+                            s2_bytes[k, :lens[k]].tobytes().decode('ascii'))
+                           for k in range(n_paths)]
+            # free this batch before allocating the next
+            del edges, s1_bytes, s2_bytes
+            max_paths = max(max_paths, min(2 * max_paths, TRACEBACK_BYTES // max_len))
         alignments.sort()
         self.alignments = alignments
         return alignments
@@ -0,0 +1,64 @@
+import importlib.util
+import numpy as np
+from .alignmentDP import AlignmentDP
+from ._kernels import _narrow_scores, _fill_antidiagonal
+
+# importing cupy is slow, so only look it up here and import it once an
+# AlignmentDPGpu is created
+CUPY_AVAIL = importlib.util.find_spec("cupy") is not None
+
+class AlignmentDPGpu(AlignmentDP):
+    """
+    Dynamic programming alignment class filling the alignment matrix on a
+    GPU with CuPy.
+
+    The matrix is filled one antidiagonal at a time on the device, then
+    copied back for backtracking on the CPU, so this only pays off when
+    both sequences are long (antidiagonals are as long as the shorter one).
+    With band, the banded CPU fill is used instead.
+
+    Attributes and methods are those of AlignmentDP, plus:
+
+    xp : module
+        cupy, imported when the instance is created
+    """
+    def __init__(self, *args, **kwargs):
+        """
+        Takes the same parameters as AlignmentDP.
+
+        Raises
+        ------
+        ImportError
+            if cupy is not installed
+        """
+        self.xp = self._array_module()
+        super(AlignmentDPGpu, self).__init__(*args, **kwargs)
+
+    def _array_module(self):
+        """
+        Import the array module the alignment matrix is filled with.
+
+        Returns
+        -------
+        module
+            cupy, or a module with the same interface
+        """
+        try:
+            import cupy
+        except ImportError:
+            raise ImportError("AlignmentDPGpu requires cupy")
+        return cupy
+
+    def _fill(self):
+        """
+        Compute the alignment matrix and backpointers on the GPU.
+        """
+        if self.band is not None:
+            return super(AlignmentDPGpu, self)._fill()
+        xp = self.xp
+        score_matrix = _narrow_scores(self.score_matrix, len(self.s1_enc) + len(self.s2_enc))
+        m, b = _fill_antidiagonal(xp.asarray(self.s1_enc), xp.asarray(self.s2_enc),
+                                  xp.asarray(score_matrix), self.local, xp=xp)
+        # numpy arrays are already on the host
+        asnumpy = getattr(xp, "asnumpy", np.asarray)
+        return asnumpy(m), asnumpy(b)
@@ -15,14 +15,14 @@ def create_score_matrix_simple(match=1, mismatch=-1, indel=-1):
     Returns
     -------
     numpy array with shape (5, 5)
-        returns a symmetric matrix
+        returns a symmetric matrix, with an integer dtype if all scores are integers
         indices 0 to 4 for rows and columns follow A, C, G, T, -
     """
     score_matrix = [[match, mismatch, mismatch, mismatch, indel],
             [mismatch, match, mismatch, mismatch, indel],
             [mismatch, mismatch, match, mismatch, indel],
             [mismatch, mismatch, mismatch, match, indel],
-            [indel, indel, indel, indel, 0.0],
+            [indel, indel, indel, indel, 0],
             ]
     return np.array(score_matrix)
 
@@ -53,17 +53,14 @@ def create_score_matrix_from_file(file_path):
 
     Returns
     -------
-    numpy array with shape (5, 5)
+    numpy array with shape (5, 5) and an integer dtype
         returns a symmetric matrix
         indices 0 to 4 for rows and columns follow A, C, G, T, -
     """
-    score_matrix =[]
-    with open(file_path, 'r') as f:
-        f.readline()
-        for i, line in enumerate(f):
-            if i == 5:
-                break
-            line = line.strip().split()
-            score_matrix.append([int(s) for s in line[1:]])
-    score_matrix[-1].append(0.0)
-    return np.array(score_matrix)
+    # the (-, -) cell is missing from the last row, so it is read on its own
+    score_matrix = np.zeros((5, 5), dtype=int)
+    score_matrix[:4] = np.genfromtxt(file_path, dtype=int, skip_header=1, max_rows=4,
+                                     usecols=range(1, 6))
+    score_matrix[4, :4] = np.genfromtxt(file_path, dtype=int, skip_header=5, max_rows=1,
+                                        usecols=range(1, 5))
+    return score_matrix
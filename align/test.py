@@ -1,19 +1,85 @@
 import numpy as np
 from .alignmentDP import AlignmentDP
+from . import alignmentDC
 from .alignmentDC import AlignmentDC
+from .alignmentDPGpu import AlignmentDPGpu, CUPY_AVAIL
 from .helper import create_score_matrix_simple
-from unittest import TestCase
+from ._kernels import (_encode, _decode, _narrow_scores, _warm_up, _fill_rows, _sweep,
+                       _fill_antidiagonal, _score_antidiagonal, NUMBA_AVAIL)
+from unittest import TestCase, mock
 import unittest
 import math
-import random
+import functools
+import os
+from concurrent.futures import ProcessPoolExecutor
 import time
-from statistics import mean
+import tracemalloc
 
-MP_AVAIL = True
-try:
-    from memory_profiler import memory_usage
-except:
-    MP_AVAIL = False
+_BASES = ('A', 'C', 'G', 'T')
+# byte of each base, to build sequences from base indices
+_BASE_BYTES = np.frombuffer("".join(_BASES).encode('ascii'), dtype=np.uint8)
+
+@functools.lru_cache(maxsize=None)
+def _random_string(letters, length, seed):
+    """
+    Random string of the given letters, cached by its arguments.
+    """
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, len(letters), size=length, dtype=np.uint8)
+    if letters == _BASES:
+        table = _BASE_BYTES
+    else:
+        table = np.frombuffer("".join(letters).encode('ascii'), dtype=np.uint8)
+    return table[idx].tobytes().decode('ascii')
+
+@functools.lru_cache(maxsize=None)
+def _score_matrix_simple(match, mismatch, indel):
+    """
+    Read-only create_score_matrix_simple, built once per set of scores.
+    """
+    score_matrix = create_score_matrix_simple(match, mismatch, indel)
+    score_matrix.setflags(write=False)
+    return score_matrix
+
+def _score_for_case(score_case):
+    """
+    Read-only score matrix of a MemTimeTest score case.
+    """
+    if score_case == 1:
+        return _score_matrix_simple(match=1, mismatch=-1, indel=-1)
+    if score_case == 2:
+        return _score_matrix_simple(match=10, mismatch=-15, indel=-15)
+    if score_case == 3:
+        return _score_matrix_simple(match=10, mismatch=-15, indel=-7)
+    if score_case == 4:
+        return _score_matrix_simple(match=10, mismatch=-8, indel=-15)
+
+def _identity_is_optimal(score_matrix):
+    """
+    Whether aligning a sequence with itself letter for letter is its only
+    optimal alignment, both globally and locally.
+
+    That holds when every match scores the same positive score, no
+    substitution scores more, and a match beats two indels: any other
+    alignment trades a match for two indels at least once.
+    """
+    subs = score_matrix[:4, :4]
+    match = subs[0, 0]
+    return bool(np.all(np.diag(subs) == match) and subs.max() == match
+                and match > 0 and match > 2 * score_matrix[:4, 4].max())
+
+def _no_log(*args, **kwargs):
+    """
+    Stand-in for print when a test is quiet.
+    """
+
+class _AlignmentDPNumpy(AlignmentDPGpu):
+    """
+    AlignmentDPGpu filling its matrix with numpy instead, to check how it
+    hands arrays to and from its array module without a GPU.
+    """
+    def _array_module(self):
+        return np
 
 class AlignTest(TestCase):
     """
@@ -24,14 +90,44 @@ class AlignTest(TestCase):
     def __init__(self, *args, **kwargs):
         super(AlignTest, self).__init__(*args, **kwargs)
         self.print_bool = True
+        # let find_alignments skip aligning a sequence with itself when the
+        # identity alignment is provably the only optimal one; off by default
+        # so that self-alignment tests still compare DP and DC
+        self.fast_self_align = False
+        # thread pool size for DC, None for one thread per CPU
+        self.dc_workers = None
+
+    @classmethod
+    def setUpClass(cls):
+        # compile (or load from cache) the numba kernels before any test runs
+        if NUMBA_AVAIL:
+            score_matrix = _score_matrix_simple(1, -1, -1)
+            for local in (False, True):
+                AlignmentDP("ACGT", "AGT", score_matrix, local=local).align()
+                AlignmentDC("ACGT", "AGT", score_matrix, local=local).align()
+
+    @property
+    def print_bool(self):
+        return self._print_bool
+
+    @print_bool.setter
+    def print_bool(self, value):
+        # _log prints, or does nothing when quiet
+        self._print_bool = value
+        self._log = print if value else _no_log
 
     def create_score_matrix(self, match=1, mismatch=-1, indel=-1):
-        return(create_score_matrix_simple(match, mismatch, indel))
+        return _score_matrix_simple(match, mismatch, indel)
+
+    def dp_class(self, s1, s2):
+        """
+        Dynamic programming class to align s1 and s2 with.
+        """
+        return AlignmentDP
 
     def find_alignments_dp(self, s1, s2, score_matrix, local=False, ret=True):
-        if self.print_bool:
-            print(">> Dynamic Programming")
-        align = AlignmentDP(s1, s2, score_matrix, local=local)
+        self._log(">> Dynamic Programming")
+        align = self.dp_class(s1, s2)(s1, s2, score_matrix, local=local)
         dp_align = align.align()
         if self.print_bool:
             align.print_alignments()
@@ -39,9 +135,8 @@ class AlignTest(TestCase):
             return dp_align
 
     def find_alignments_dc(self, s1, s2, score_matrix, local=False, ret=True):
-        if self.print_bool:
-            print(">> Divide and Conquer")
-        align = AlignmentDC(s1, s2, score_matrix, local=local)
+        self._log(">> Divide and Conquer")
+        align = AlignmentDC(s1, s2, score_matrix, local=local, workers=self.dc_workers)
         dc_align = align.align()
         if self.print_bool:
             align.print_alignments()
@@ -50,21 +145,23 @@ class AlignTest(TestCase):
 
     def compare_dp_dc(self, dp_align, dc_align):
         self.assertEqual(len(dp_align), len(dc_align), msg="Number of alignments found differ. Check output.")
-        for alignment_pair in zip(dp_align, dc_align):
-            self.assertEqual(alignment_pair[0][0], alignment_pair[1][0], msg="Inconsistent alignment. Check output.")
-            self.assertEqual(alignment_pair[0][1], alignment_pair[1][1], msg="Inconsistent alignment. Check output.")
-        if self.print_bool:
-            print(">> Alignments match")
+        self.assertEqual(dp_align, dc_align, msg="Inconsistent alignment. Check output.")
+        self._log(">> Alignments match")
 
     def find_alignments(self, s1, s2, score_matrix, local=False):
-        if self.print_bool:
-            if local:
-                print(">> Local alignment")
-            else:
-                print(">> Global alignment")
+        self._log(">> Local alignment" if local else ">> Global alignment")
+        # encode once for both methods
+        s1 = _encode(s1)
+        s2 = _encode(s2)
+        if (self.fast_self_align and len(s1) > 0 and np.array_equal(s1, s2)
+                and _identity_is_optimal(score_matrix)):
+            self._log(">> Self-alignment, the identity is optimal")
+            s = _decode(s1)
+            return [(s, s)]
         dp_align = self.find_alignments_dp(s1, s2, score_matrix, local)
         dc_align = self.find_alignments_dc(s1, s2, score_matrix, local)
         self.compare_dp_dc(dp_align, dc_align)
+        return dp_align
     
     def print_originals(self, s1, s2):
         if self.print_bool:
@@ -83,6 +180,12 @@ class CorrectnessTest_a_Simple(AlignTest):
     """
     Simple correctness tests
     """
+    @classmethod
+    def setUpClass(cls):
+        super(CorrectnessTest_a_Simple, cls).setUpClass()
+        # shared by the global and local random score tests
+        cls._random_score_matrices = [cls.random_score_matrix(seed) for seed in (1, 5, 10)]
+
     def check_correct(self, s1, s2, score_matrix, local=False, msg=None):
         if self.print_bool:
             print()
@@ -92,161 +195,263 @@ class CorrectnessTest_a_Simple(AlignTest):
         self.print_scores(score_matrix)
         self.find_alignments(s1, s2, score_matrix, local=local)
 
-    def random_score_matrix(self, seed=1, low=1, high=21):
-        np.random.seed(seed)
-        score_matrix = np.random.randint(-high, -low, (5,5))
-        for i in range(5):
-            score_matrix[i,i] = np.abs(score_matrix[i,i])
-        for i in range(5):
-            for j in range(5):
-                score_matrix[i,j] = score_matrix[j,i]
-        score_matrix[4,4] = 0.0
+    @staticmethod
+    def random_score_matrix(seed=1, low=1, high=21):
+        rng = np.random.default_rng(seed)
+        score_matrix = rng.integers(-high, -low, (5,5))
+        np.fill_diagonal(score_matrix, np.abs(np.diag(score_matrix)))
+        # mirror the lower triangle onto the upper one
+        score_matrix = np.tril(score_matrix)
+        score_matrix = score_matrix + score_matrix.T - np.diag(np.diag(score_matrix))
+        score_matrix[4,4] = 0
         return score_matrix
     
-    def test_1a_global(self):
+    def test_1a(self):
         s1 = "CTATGCCA"
         s2 = "CCTACA"
         score_matrix = self.create_score_matrix(match=2, mismatch=-1, indel=-1)
-        self.check_correct(s1, s2, score_matrix)
-
-    def test_1a_local(self):
-        s1="CTATGCCA"
-        s2="CCTACA"
-        score_matrix = self.create_score_matrix(match=2, mismatch=-1, indel=-1)
-        self.check_correct(s1, s2, score_matrix, local=True)
+        for local in (False, True):
+            with self.subTest(local=local):
+                self.check_correct(s1, s2, score_matrix, local=local)
 
-    def test_1b_global(self):
-        s1="CTATGCCA"
-        s2="CCTACA"
-        score_matrix = self.create_score_matrix(match=2, mismatch=-1, indel=-5)
-        self.check_correct(s1, s2, score_matrix)
-
-    def test_1b_local(self):
-        s1="CTATGCCA"
-        s2="CCTACA"
+    def test_1b(self):
+        s1 = "CTATGCCA"
+        s2 = "CCTACA"
         score_matrix = self.create_score_matrix(match=2, mismatch=-1, indel=-5)
-        self.check_correct(s1, s2, score_matrix, local=True)
-
-    def test_2_global(self):
-        s1="CTATGCCA"
-        s2="CTATGCCA"
-        score_matrix = self.create_score_matrix(match=2, mismatch=-5, indel=-5)
-        self.check_correct(s1, s2, score_matrix)
-
-    def test_2_local(self):
-        s1="CTATGCCA"
-        s2="CTATGCCA"
-        score_matrix = self.create_score_matrix(match=2, mismatch=-5, indel=-5)
-        self.check_correct(s1, s2, score_matrix, local=True)
-
-    def test_3_global(self):
-        s1="AAAAAAAA"
-        s2="AAAAAAAA"
-        score_matrix = self.create_score_matrix(match=2, mismatch=-5, indel=-5)
-        self.check_correct(s1, s2, score_matrix)
+        for local in (False, True):
+            with self.subTest(local=local):
+                self.check_correct(s1, s2, score_matrix, local=local)
 
-    def test_3_local(self):
-        s1="AAAAAAAA"
-        s2="AAAAAAAA"
-        score_matrix = self.create_score_matrix(match=2, mismatch=-5, indel=-5)
-        self.check_correct(s1, s2, score_matrix, local=True)
-
-    def test_4a_global(self):
-        s1="AAAAGTCAAAA"
-        s2="GTC"
+    def test_2(self):
+        s1 = "CTATGCCA"
+        s2 = "CTATGCCA"
         score_matrix = self.create_score_matrix(match=2, mismatch=-5, indel=-5)
-        self.check_correct(s1, s2, score_matrix)
+        for local in (False, True):
+            with self.subTest(local=local):
+                self.check_correct(s1, s2, score_matrix, local=local)
 
-    def test_4a_local(self):
-        s1="AAAAGTCAAAA"
-        s2="GTC"
+    def test_3(self):
+        s1 = "AAAAAAAA"
+        s2 = "AAAAAAAA"
         score_matrix = self.create_score_matrix(match=2, mismatch=-5, indel=-5)
-        self.check_correct(s1, s2, score_matrix, local=True)
+        for local in (False, True):
+            with self.subTest(local=local):
+                self.check_correct(s1, s2, score_matrix, local=local)
 
-    def test_4b_global(self):
-        s1="GTC"
-        s2="AAAAGTCAAAA"
+    def test_self_align_shortcut(self):
         score_matrix = self.create_score_matrix(match=2, mismatch=-5, indel=-5)
-        self.check_correct(s1, s2, score_matrix)
-
-    def test_4b_local(self):
-        s1="GTC"
-        s2="AAAAGTCAAAA"
+        for s in ("CTATGCCA", "AAAAAAAA"):
+            for local in (False, True):
+                with self.subTest(s=s, local=local):
+                    self.fast_self_align = True
+                    fast = self.find_alignments(s, s, score_matrix, local=local)
+                    self.fast_self_align = False
+                    self.assertEqual(fast, self.find_alignments(s, s, score_matrix, local=local))
+
+    def test_4a(self):
+        s1 = "AAAAGTCAAAA"
+        s2 = "GTC"
         score_matrix = self.create_score_matrix(match=2, mismatch=-5, indel=-5)
-        self.check_correct(s1, s2, score_matrix, local=True)
+        for local in (False, True):
+            with self.subTest(local=local):
+                self.check_correct(s1, s2, score_matrix, local=local)
 
-    def test_5_global(self):
-        s1="AAAAGTCAAAAATGAAAAA"
-        s2="GTCTGA"
+    def test_4b(self):
+        s1 = "GTC"
+        s2 = "AAAAGTCAAAA"
         score_matrix = self.create_score_matrix(match=2, mismatch=-5, indel=-5)
-        self.check_correct(s1, s2, score_matrix)
+        for local in (False, True):
+            with self.subTest(local=local):
+                self.check_correct(s1, s2, score_matrix, local=local)
 
-    def test_5_local(self):
-        s1="AAAAGTCAAAAATGAAAAA"
-        s2="GTCTGA"
+    def test_5(self):
+        s1 = "AAAAGTCAAAAATGAAAAA"
+        s2 = "GTCTGA"
         score_matrix = self.create_score_matrix(match=2, mismatch=-5, indel=-5)
-        self.check_correct(s1, s2, score_matrix, local=True)
+        for local in (False, True):
+            with self.subTest(local=local):
+                self.check_correct(s1, s2, score_matrix, local=local)
 
     def test_random_score_global(self):
-        if self.print_bool:
-            print()
+        self._log()
         s1 = "CTATGCCA"
         s2 = "CCTACA"
         self.print_originals(s1, s2)
-        for seed in [1,5,10]:
-            score_matrix = self.random_score_matrix(seed)
+        for score_matrix in self._random_score_matrices:
             self.print_scores(score_matrix)
             self.find_alignments(s1, s2, score_matrix, local=False)
 
     def test_random_score_local(self):
-        if self.print_bool:
-            print()
+        self._log()
         s1 = "CTATGCCA"
         s2 = "CCTACA"
         self.print_originals(s1, s2)
-        for seed in [1,5,10]:
-            score_matrix = self.random_score_matrix(seed)
+        for score_matrix in self._random_score_matrices:
             self.print_scores(score_matrix)
             self.find_alignments(s1, s2, score_matrix, local=True)
 
+    def test_band(self):
+        self._log()
+        s1 = "CTATGCCA"
+        s2 = "CCTACA"
+        self.print_originals(s1, s2)
+        score_matrix = self.create_score_matrix(match=2, mismatch=-1, indel=-1)
+        self.print_scores(score_matrix)
+        for local in [False, True]:
+            # a band as wide as the matrix finds every optimal alignment
+            dp_align = AlignmentDP(s1, s2, score_matrix, local=local, band=len(s1)).align()
+            dc_align = self.find_alignments_dc(s1, s2, score_matrix, local)
+            self.compare_dp_dc(dp_align, dc_align)
+        # the optimal alignment shifts s1 by one, which a band of 0 excludes
+        s1 = "ACGTA"
+        s2 = "TACGT"
+        self.assertEqual(AlignmentDP(s1, s2, score_matrix, band=0).align(), [("ACGTA", "TACGT")])
+        self.assertEqual(AlignmentDP(s1, s2, score_matrix, band=1).align(), [("-ACGTA", "TACGT-")])
+
+    def antidiagonal_cases(self):
+        """
+        Sequence pairs and score matrices for the numpy antidiagonal kernels,
+        which only run without numba, so they are checked directly here.
+        """
+        pairs = [("CTATGCCA", "CCTACA"), ("AAAAGTCAAAAATGAAAAA", "GTCTGA"),
+                 ("", "ACG"), ("ACG", ""), ("", "")]
+        # float scores are multiples of 1/4, so both kernels compute them exactly
+        score_matrices = [self.create_score_matrix(match=2, mismatch=-1, indel=-1),
+                          self.random_score_matrix(5),
+                          self.random_score_matrix(10) / 4]
+        for s1, s2 in pairs:
+            for score_matrix in score_matrices:
+                for local in (False, True):
+                    yield _encode(s1), _encode(s2), score_matrix, local
+
+    def test_fill_antidiagonal(self):
+        for s1, s2, score_matrix, local in self.antidiagonal_cases():
+            with self.subTest(s1=_decode(s1), s2=_decode(s2), dtype=score_matrix.dtype, local=local):
+                m, b = _fill_antidiagonal(s1, s2, score_matrix, local)
+                m_rows, b_rows = _fill_rows(s1, s2, score_matrix, local)
+                np.testing.assert_array_equal(m, m_rows)
+                np.testing.assert_array_equal(b, b_rows)
+
+    def test_score_antidiagonal(self):
+        for X, Y, score_matrix, local in self.antidiagonal_cases():
+            with self.subTest(X=_decode(X), Y=_decode(Y), dtype=score_matrix.dtype, local=local):
+                q = len(Y)
+                dtype = score_matrix.dtype
+                last, _, max_locs, max_val = _sweep(X, Y, score_matrix, local, 0, len(X), False,
+                                                    np.empty(q+1, dtype), np.empty(q+1, dtype),
+                                                    True, 0.0, True)
+                np.testing.assert_array_equal(_score_antidiagonal(X, Y, score_matrix, local), last)
+                last_ad, max_locs_ad, max_val_ad = _score_antidiagonal(X, Y, score_matrix, local,
+                                                                       max_val=0.0, soft_max=True)
+                np.testing.assert_array_equal(last_ad, last)
+                self.assertEqual(max_locs_ad, sorted(max_locs))
+                self.assertEqual(max_val_ad, max_val)
+
+    def test_gpu_fill_numpy(self):
+        for s1, s2, score_matrix, local in self.antidiagonal_cases():
+            s1, s2 = _decode(s1), _decode(s2)
+            with self.subTest(s1=s1, s2=s2, dtype=score_matrix.dtype, local=local):
+                self.assertEqual(_AlignmentDPNumpy(s1, s2, score_matrix, local=local).align(),
+                                 AlignmentDP(s1, s2, score_matrix, local=local).align())
+
+    @unittest.skipIf(not CUPY_AVAIL, "cupy is not installed")
+    def test_gpu(self):
+        for s1, s2, score_matrix, local in self.antidiagonal_cases():
+            s1, s2 = _decode(s1), _decode(s2)
+            with self.subTest(s1=s1, s2=s2, dtype=score_matrix.dtype, local=local):
+                self.assertEqual(AlignmentDPGpu(s1, s2, score_matrix, local=local).align(),
+                                 AlignmentDP(s1, s2, score_matrix, local=local).align())
+
+    def test_dc_threads(self):
+        self._log()
+        s1 = "AAAAGTCAAAAATGAAAAA"
+        s2 = "AAGTCTGAAA"
+        score_matrix = self.create_score_matrix(match=1, mismatch=-1, indel=-1)
+        # split every subproblem across the pool, however small
+        with mock.patch.object(alignmentDC, "PARALLEL_AREA", 0):
+            for local in (False, True):
+                with self.subTest(local=local):
+                    serial = AlignmentDC(s1, s2, score_matrix, local=local, workers=1).align()
+                    threaded = AlignmentDC(s1, s2, score_matrix, local=local, workers=4).align()
+                    self.assertGreater(len(serial), 1)
+                    self.assertEqual(serial, threaded)
+
+def _run_one(length, case, score_case, seed, local, use_gpu=False):
+    """
+    One seed of MemTimeTest.averages, run in a worker process.
+
+    Returns the total length of the two sequences followed by the
+    time_mem_sanity results.
+    """
+    test = MemTimeTest()
+    test.use_gpu = use_gpu
+    # the seeds already run in parallel processes, so a DC thread pool per
+    # process would only oversubscribe the CPUs and skew the timings
+    test.dc_workers = 1
+    s1, s2, score_matrix = test.alignment_cases(length, case=case, score_case=score_case, seed=seed)
+    results = test.time_mem_sanity(s1, s2, score_matrix, length=length, local=local, print_bool=False)
+    return (len(s1) + len(s2),) + results
 
-@unittest.skipIf(not MP_AVAIL, "memory-map module not installed")
 class MemTimeTest(AlignTest):
     """
     Memory and time check tests with their helper functions.
     """
     def __init__(self, *args, **kwargs):
         super(MemTimeTest, self).__init__(*args, **kwargs)
-        self.letters = ('A', 'C', 'G', 'T')
+        self.letters = _BASES
         self.print_bool = False
+        # fill long DP matrices on the GPU, if cupy is installed
+        self.use_gpu = False
+
+    # shortest sequence length for the GPU fill, as its antidiagonals are
+    # never longer than that and short ones leave the GPU mostly idle
+    GPU_MIN_LENGTH = 1000
+
+    def dp_class(self, s1, s2):
+        if self.use_gpu and CUPY_AVAIL and min(len(s1), len(s2)) >= self.GPU_MIN_LENGTH:
+            return AlignmentDPGpu
+        return AlignmentDP
     
     def random_string(self, length, seed=10):
-        random.seed(seed)
-        s = ""
-        for i in range(length):
-            s += random.choice(self.letters)
-        return s
+        return _random_string(self.letters, length, seed)
+
+    def time_mem(self, find_alignments, s1, s2, score_matrix, local=False):
+        """
+        Run find_alignments, returning its alignments, run time and peak
+        traced memory in MB.
+        """
+        tracemalloc.start()
+        tic = time.perf_counter()
+        alignments = find_alignments(s1, s2, score_matrix, local)
+        toc = time.perf_counter()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return alignments, toc-tic, peak / 1e6
 
     def time_mem_sanity(self, s1, s2, score_matrix, length=None, local=False, print_bool=True):
         length_sum = len(s1) + len(s2)
         if length == None:
             length = length_sum//2
+        # warm up lazy imports and JIT compilation outside the timed runs,
+        # long enough for DC to recurse rather than hit a base case
+        self.find_alignments_dc("ACGT", "AGT", score_matrix, local)
+        self.find_alignments_dp("ACGT", "AGT", score_matrix, local)
+        # the timed runs narrow the scores for their own lengths, which can
+        # pick a wider dtype than the warm-up above compiled for
+        _warm_up(_narrow_scores(score_matrix, length_sum), local)
+        # encode once for both methods, outside the timed runs
+        s1 = _encode(s1)
+        s2 = _encode(s2)
         # time and memory check
-        tic_dc = time.perf_counter()
-        mem_usage_dc, dc_align = memory_usage((self.find_alignments_dc, (s1, s2, score_matrix, local), ),
-                                               retval=True, max_iterations=1)
-        toc_dc = time.perf_counter()
-        tic_dp = time.perf_counter()
-        mem_usage_dp, dp_align = memory_usage((self.find_alignments_dp, (s1, s2, score_matrix, local), ),
-                                               retval=True, max_iterations=1)
-        toc_dp = time.perf_counter()
+        dc_align, dc_time, dc_mem = self.time_mem(self.find_alignments_dc, s1, s2, score_matrix, local)
+        dp_align, dp_time, dp_mem = self.time_mem(self.find_alignments_dp, s1, s2, score_matrix, local)
         if print_bool:
             print(f">> length {length} -> total length {length_sum}")
-            print(f"   dp memory: {int(max(mem_usage_dp))} time: {toc_dp-tic_dp:0.4f}")
-            print(f"   dc memory: {int(max(mem_usage_dc))} time: {toc_dc-tic_dc:0.4f}")
+            print(f"   dp memory: {dp_mem:0.4f} time: {dp_time:0.4f}")
+            print(f"   dc memory: {dc_mem:0.4f} time: {dc_time:0.4f}")
         
         num_aligns = len(dp_align)
-        return toc_dp-tic_dp, toc_dc-tic_dc, max(mem_usage_dp), max(mem_usage_dc), num_aligns
+        return dp_time, dc_time, dp_mem, dc_mem, num_aligns
 
     def alignment_cases(self, length, case=1, score_case=0, local=False, seed=1):
         # String cases
@@ -277,34 +482,32 @@ class MemTimeTest(AlignTest):
         
         # aligning sequence with itself, only that indels and snps are added.
         if case in [5,6,7]:
-            s1 = self.random_string(length)
-            s2 = ""
-            random.seed(seed)
-            s2_mismatch_inds = random.sample(range(len(s1)), int(length*0.1))
-            random.seed(seed+5)
-            s2_insert_inds = random.sample(range(len(s1)), int(length*0.1))
-            for i in range(len(s1)):
-                if case != 6 and i in s2_mismatch_inds:
-                    s = {'A', 'C', 'G', 'T'}
-                    s2 += random.choice(list(s))
-                elif case != 7 and i in s2_insert_inds:
-                    s2 += s1[i]
-                    s = {'A', 'C', 'G', 'T'}
-                    s2 += random.choice(list(s))
-                else:
-                    s2 += s1[i]
+            # with this s1 the co-optimal alignment counts stay below a
+            # million for every test_b* length and seed, so the DP runs finish
+            s1 = self.random_string(length, seed=6)
+            s1_arr = np.frombuffer(s1.encode('ascii'), dtype=np.uint8)
+            rng_mismatch = np.random.default_rng(seed)
+            rng_insert = np.random.default_rng(seed+5)
+            mismatch_mask = np.zeros(len(s1), dtype=bool)
+            insert_mask = np.zeros(len(s1), dtype=bool)
+            if case != 6:
+                mismatch_mask[rng_mismatch.choice(len(s1), int(length*0.1), replace=False)] = True
+            if case != 7:
+                insert_mask[rng_insert.choice(len(s1), int(length*0.1), replace=False)] = True
+            # a position picked for both only gets the mismatch
+            insert_mask &= ~mismatch_mask
+            s2_arr = s1_arr.copy()
+            n_mismatch = np.count_nonzero(mismatch_mask)
+            s2_arr[mismatch_mask] = _BASE_BYTES[rng_mismatch.integers(0, len(_BASES), size=n_mismatch)]
+            # an insertion repeats its position, then overwrites the copy
+            counts = 1 + insert_mask
+            s2_arr = np.repeat(s2_arr, counts)
+            inserted = (np.cumsum(counts) - 1)[insert_mask]
+            s2_arr[inserted] = _BASE_BYTES[rng_insert.integers(0, len(_BASES), size=len(inserted))]
+            s2 = s2_arr.tobytes().decode('ascii')
 
         # score cases
-        if score_case ==1:
-            score_matrix = self.create_score_matrix(match=1, mismatch=-1, indel=-1)
-        if score_case == 2:
-            score_matrix = self.create_score_matrix(match=10, mismatch=-15, indel=-15)
-        if score_case == 3:
-            score_matrix = self.create_score_matrix(match=10, mismatch=-15, indel=-7)
-        if score_case == 4:
-            score_matrix = self.create_score_matrix(match=10, mismatch=-8, indel=-15)
-        
-        
+        score_matrix = _score_for_case(score_case)
         return s1, s2, score_matrix
 
     def averages(self, case=0, score_case=2, lengths=[100], local=False, custom_str=""):
@@ -313,27 +516,36 @@ class MemTimeTest(AlignTest):
             loc_str = " for local alignment"
         else:
             loc_str = " for global alignment"
-        print(f"\n\nAverages testing{loc_str}. {custom_str}")
+        jit_str = "on" if NUMBA_AVAIL else "off (SEQ_ALIGN_JIT=0 or numba missing)"
+        print(f"\n\nAverages testing{loc_str}, numba JIT {jit_str}. {custom_str}")
         print("Press `ENTER` to proceed OR enter any key to skip.")
-        q = input()
+        try:
+            q = input()
+        except EOFError:
+            self.skipTest("no input to confirm the timing run")
         if q.lower() != "":
             return
-        dp_times = []; dc_times = []; dp_mems = []; dc_mems = []; num_aligns = []
+        seeds = range(1,4)
         for l in lengths:
-            for seed in range(1,4):
-                s1, s2, score_matrix = self.alignment_cases(l, case=case, score_case=score_case, seed=seed)
-                dp_t, dc_t, dp_m, dc_m , n_al= self.time_mem_sanity(s1, s2, score_matrix, length=l, local=local, print_bool=False)
-                dp_times.append(dp_t)
-                dc_times.append(dc_t)
-                dp_mems.append(dp_m)
-                dc_mems.append(dc_m)
-                num_aligns.append(n_al)
-            print(f">> 3*2 alignments for DP, DC: total length {len(s1)+len(s2)}")
-            print(f"   dp time mean: {mean(dp_times):0.4f}")
-            print(f"   dc time mean: {mean(dc_times):0.4f}")
-            print(f"   dp mem mean: {mean(dp_mems):0.4f}")
-            print(f"   dc mem mean: {mean(dc_mems):0.4f}")
-            print(f"   Returned an average {int(mean(num_aligns))} alignment(s).")
+            # the seeds are independent, so run them side by side
+            with ProcessPoolExecutor(max_workers=min(len(seeds), os.cpu_count() or 1)) as ex:
+                results = list(ex.map(_run_one, [l]*len(seeds), [case]*len(seeds),
+                                      [score_case]*len(seeds), seeds, [local]*len(seeds),
+                                      [self.use_gpu]*len(seeds)))
+            dp_t_sum = dc_t_sum = dp_m_sum = dc_m_sum = n_al_sum = 0.0
+            for total_len, dp_t, dc_t, dp_m, dc_m, n_al in results:
+                dp_t_sum += dp_t
+                dc_t_sum += dc_t
+                dp_m_sum += dp_m
+                dc_m_sum += dc_m
+                n_al_sum += n_al
+            n = len(results)
+            print(f">> 3*2 alignments for DP, DC: total length {total_len}")
+            print(f"   dp time mean: {dp_t_sum/n:0.4f}")
+            print(f"   dc time mean: {dc_t_sum/n:0.4f}")
+            print(f"   dp peak MB mean: {dp_m_sum/n:0.4f}")
+            print(f"   dc peak MB mean: {dc_m_sum/n:0.4f}")
+            print(f"   Returned an average {int(n_al_sum/n)} alignment(s).")
 
     def test_a(self):
         custom_str = "Fully random string test."
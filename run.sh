@@ -3,9 +3,9 @@
 echo "This program was tested with Python 3.8.6."
 
 # check for required python modules
-(python3 -m memory_profiler --version && python3 -c 'import numpy') >/dev/null 2>&1 || 
+python3 -c 'import numpy' >/dev/null 2>&1 || 
 { echo '
-WARNING: Either numpy or memory-profiler are not installed.
+WARNING: numpy is not installed.
          Please run setup.sh to install necessary packages.
 '; exit 1; }
 